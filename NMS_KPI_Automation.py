@@ -7,6 +7,9 @@ THIS SCRIPT DOES THE FOLLOWING THREE THINGS.
 ONE, MAKE A CONNECTION TO AN FTP AND PULLS DATA.
 TWO, TAKES THE VARIOUS INPUT FILES AND PERFORMS SOME DATA ANALYSIS SUCH AS ADDING THE BUSINESS DAYS AGING.
 THREE, UPLOAD AND APPEND THE RESULTS TO EXISTING GOOGLE SHEETS THAT RESIDE ON THE GOOGLE TEAM DRIVE.
+
+BY DEFAULT THE SCRIPT IS A ONE-SHOT WEEKLY RUN. WITH --watch IT KEEPS THE SFTP SESSION OPEN AND PROCESSES EACH REPORT AS IT LANDS.
+WITH --local PATH IT READS THE REPORTS FROM A LOCAL DIRECTORY INSTEAD OF THE SFTP.
 '''
 # google drive, sheets libraries that need to be imported for upload
 from __future__ import print_function
@@ -23,9 +26,17 @@ import datetime
 import json # data conversion
 
 import sys # Library to determine script directory
+import argparse # command line options
+
+# Libraries needed for watch mode
+import time
+import queue
+import threading
+import shutil
 
 # Libraries needed for SFTP connection
 import pysftp
+import paramiko
 import io
 
 # determine if application is a script file or frozen exe
@@ -33,6 +44,94 @@ if getattr(sys, 'frozen', False):
     directory = os.path.dirname(os.path.realpath(sys.executable))
 else:
     directory = os.path.abspath('')
+
+# Watch mode settings. Seconds between directory listings, seconds a file must stay unchanged before it is read
+# and the number of downloaded reports that can wait for upload.
+WATCH_POLL_INTERVAL = 60
+WATCH_SETTLE_TIME = 120
+WATCH_QUEUE_SIZE = 4
+
+# File in the script directory where the watch mode saves which version of each report it has finished with
+WATCH_STATE_FILE = 'watch_state.json'
+
+# Number of times a Google Sheets request is retried, with exponential backoff, after a rate limit (429) or server (5xx) error
+UPLOAD_RETRIES = 5
+
+# Date formats used by the CTDI report extracts. Text dates are parsed with these exact formats when the report is read,
+# trying each format in the list in turn. Cells Excel already stores as dates come through as dates and do not need a format.
+DATE_FORMATS = ['%m/%d/%Y']
+DATETIME_FORMATS = ['%m/%d/%Y %H:%M:%S', '%m/%d/%Y %H:%M', '%m/%d/%Y']
+
+# The formats above have not been checked against a live extract yet. Until they are, text dates that match none of them
+# are printed as a warning and left blank, the same as before the schemas. Set this to True to fail the report instead.
+STRICT_DATE_FORMATS = False
+
+# Schema for each report. 'required' lists the columns the transforms use, 'dtypes' the numeric columns and their types,
+# and 'dates' the date columns and their formats. Columns in 'dtypes' and 'dates' are required as well.
+# Reports that are only passed through to Google Sheets (ingest_file_method) have no schema.
+REPORT_SCHEMAS = {
+    '01_ORD_OPEN_ALL_RSL.xlsx': {
+        'required': ['ORD_TYPE', 'ORD_STATUS'],
+        'dtypes': {},
+        'dates': {'ORD_DATE': DATE_FORMATS},
+    },
+    '06_RPLN_OPEN.xlsx': {
+        'required': [],
+        'dtypes': {},
+        'dates': {'ORD_DATE': DATE_FORMATS},
+    },
+    'Incomplete_RSL_Transfer.xlsx': {
+        'required': [],
+        'dtypes': {},
+        'dates': {'ORD_DATE': DATE_FORMATS},
+    },
+    '02_CS_MOL.xlsx': {
+        'required': ['STATUS'],
+        'dtypes': {},
+        'dates': {'SHIP_TIME': DATETIME_FORMATS},
+    },
+    '02_OSL_TSL_MOL.xlsx': {
+        'required': [],
+        'dtypes': {},
+        'dates': {'FINALIZE_DATE': DATE_FORMATS},
+    },
+    '08_OPEN_RPLN_NEW_PUTAWAY.xlsx': {
+        'required': ['ORD_TYPE'],
+        'dtypes': {},
+        'dates': {'SHIP_TIME': DATETIME_FORMATS},
+    },
+    '01_ORD_CLOSED_RSL.xlsx': {
+        'required': [],
+        'dtypes': {},
+        'dates': {
+            'ORD_DATE': DATE_FORMATS,
+            'ORDER_MODIFIED_DATE': DATE_FORMATS,
+            'BORROWED_DATE': DATE_FORMATS,
+            'PENDING_RETURN_DATE': DATE_FORMATS,
+            'FINALIZE_DATE': DATE_FORMATS,
+            'RETURN_DATE': DATE_FORMATS,
+            'REPLEN_DATE': DATE_FORMATS,
+            'RMS_CREATE_DATE': DATE_FORMATS,
+            'RMS_SHIP_TIME': DATETIME_FORMATS,
+            'RMS_RECV_TIME': DATETIME_FORMATS,
+            'NMS_SHIP_TIME': DATETIME_FORMATS,
+        },
+    },
+    'RSL_Planning_Rpt.xlsx': {
+        'required': ['UNIT', 'DESCRIPTION', 'CUSTOMER CODE', 'STOCK_LOC_ID', 'STATE'],
+        'dtypes': {'BOH': 'float64', 'OPTIMAL_KEEP': 'float64', 'TWO_YR_USAGE': 'float64'},
+        'dates': {},
+    },
+    'Zero_Stock.xlsx': {
+        'required': ['STATE', 'ORDER_REFERENCE'],
+        'dtypes': {},
+        'dates': {},
+    },
+}
+
+# Raised when a report does not match its schema
+class ReportSchemaError(Exception):
+    pass
     
 # Method for authenticating Google Sheets login
 def google_sheets():
@@ -98,9 +197,6 @@ def ingest_rpln_open_and_transfers(data):
     # initialize empty dataframe
     filter_data = pd.DataFrame()
     
-    # change the data type of order date ORD_DATE from string to date
-    data['ORD_DATE'] = pd.to_datetime(data['ORD_DATE'],errors='coerce')
-    
     # calculate the business days aging for open replenishments
     data['Business_Days_Aging'] = np.busday_count(data['ORD_DATE'].values.astype('datetime64[D]'),np.datetime64(datetime.datetime.today()).astype('datetime64[D]'))
     
@@ -127,9 +223,6 @@ def ord_open_all_rsl(data):
     # filter data on order type MOL, order status B, O and PR
     data = data.query("ORD_TYPE == 'MOL' & (ORD_STATUS == 'B' or ORD_STATUS == 'O' or ORD_STATUS == 'PR')")  
     
-    # change the data type of order date ORD_DATE from string to date
-    data['ORD_DATE'] = pd.to_datetime(data['ORD_DATE'],errors='coerce')
-    
     # calculate the business days aging for incomplete orders
     data['Business_Days_Aging'] = np.busday_count(data['ORD_DATE'].values.astype('datetime64[D]'),np.datetime64(datetime.datetime.today()).astype('datetime64[D]'))
     
@@ -155,9 +248,6 @@ def cs_mol_return(data):
     # filter data on order status shippped
     data = data.query("STATUS == 'S'")
     
-    # change the data type of ship time SHIP_TIME from string to date
-    data['SHIP_TIME'] = pd.to_datetime(data['SHIP_TIME'],errors='coerce') 
-    
     # initialize empty list
     Business_Days_Aging = []
     
@@ -190,9 +280,6 @@ def osl_tsl_mol_return(data):
     # initialize empty dataframe
     filter_data = pd.DataFrame()
     
-    # change the data type of finalize date (FINALIZE_DATE) from string to date
-    data['FINALIZE_DATE'] = pd.to_datetime(data['FINALIZE_DATE'],errors='coerce') 
-    
     # initialize empty list
     Business_Days_Aging = []
     
@@ -230,10 +317,6 @@ def open_rpln_putaway(data):
     data_MOL = data.query("ORD_TYPE == 'MOL' or ORD_TYPE == 'SPARE-HOLD'")
     data_NEW = data.query("ORD_TYPE == 'NEW'")
     
-    # change the data type of ship time SHIP_TIME from string to date
-    data_MOL['SHIP_TIME'] = pd.to_datetime(data_MOL['SHIP_TIME'],errors='coerce') 
-    data_NEW['SHIP_TIME'] = pd.to_datetime(data_NEW['SHIP_TIME'],errors='coerce') 
-    
     # initialize empty list
     Business_Days_Aging_MOL = []
     Business_Days_Aging_NEW = []
@@ -278,19 +361,6 @@ def ord_closed_rsl(data):
     # initialize empty dataframe
     filter_data = pd.DataFrame()
     
-    # change the data type of order date ORD_DATE from string to date
-    data['ORD_DATE'] = pd.to_datetime(data['ORD_DATE'],errors='coerce')
-    data['ORDER_MODIFIED_DATE'] = pd.to_datetime(data['ORDER_MODIFIED_DATE'],errors='coerce')
-    data['BORROWED_DATE'] = pd.to_datetime(data['BORROWED_DATE'],errors='coerce')
-    data['PENDING_RETURN_DATE'] = pd.to_datetime(data['PENDING_RETURN_DATE'],errors='coerce')
-    data['FINALIZE_DATE'] = pd.to_datetime(data['FINALIZE_DATE'],errors='coerce')
-    data['RETURN_DATE'] = pd.to_datetime(data['RETURN_DATE'],errors='coerce')
-    data['REPLEN_DATE'] = pd.to_datetime(data['REPLEN_DATE'],errors='coerce')
-    data['RMS_CREATE_DATE'] = pd.to_datetime(data['RMS_CREATE_DATE'],errors='coerce')
-    data['RMS_SHIP_TIME'] = pd.to_datetime(data['RMS_SHIP_TIME'],errors='coerce')
-    data['RMS_RECV_TIME'] = pd.to_datetime(data['RMS_RECV_TIME'],errors='coerce')
-    data['NMS_SHIP_TIME'] = pd.to_datetime(data['NMS_SHIP_TIME'],errors='coerce')
-    
     # add the week number for the KPI data
     data['Week_Number'] = datetime.date.today() - datetime.timedelta(days=7)
     
@@ -366,329 +436,641 @@ def zero_stock(data):
 
     return filter_data, group_by_orders, group_by_no_orders
 
-service = google_sheets()
-
-# Change directory of public key file. Otherwise it looks at the ~/.ssh/known_hosts directory locally
-cnopts = pysftp.CnOpts(knownhosts=os.path.join(directory, '.pub'))
-
-# Instruct pysftp to not look for hostkeys directory
-cnopts.hostkeys = None
-
-# Open SFTP (secure file transfer protocol) to internal gateway that controls connection to outside networks.
-with pysftp.Connection(host='', username='', private_key=os.path.join(directory, '.pem'), cnopts=cnopts) as sftp:
-    
-    print("Connection succesfully established ... ")
-    
-    # Switch to a remote directory
-    sftp.cwd('/..../Reporting/')
-    
-    # Obtain structure of the remote directory
-    directory_structure = sftp.listdir()
-
-    # Print file names
-    for file in directory_structure:
+# Method for converting a date column using the formats from the report schema.
+# Columns Excel already stores as dates are kept as they are and numbers are converted as Excel date serials. Text is parsed
+# with each explicit format in turn, only trying the next format on the values the previous one did not match. Blank cells
+# become NaT. Text that matches none of the formats is left as NaT with a warning, or raises ReportSchemaError once
+# STRICT_DATE_FORMATS is set.
+def parse_dates(file, column, values, date_formats):
+    
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    
+    # a week with no dates in the column, read_excel reads it as float64 NaN
+    if values.isnull().all():
+        return pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    
+    # Excel stores dates as days since 1899-12-30
+    if pd.api.types.is_numeric_dtype(values):
+        return pd.to_datetime(values, unit='D', origin='1899-12-30')
+    
+    parsed = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    
+    # text cells, NaN for any other cell
+    if pd.api.types.infer_dtype(values, skipna=True) in ('string', 'empty', 'mixed', 'mixed-integer'):
+        text = values.str.strip()
+    else:
+        text = pd.Series(np.nan, index=values.index, dtype=object)
+    
+    is_text = text.notnull() & (text != '')
+    is_blank = values.isnull() | (text == '')
+    
+    unparsed = is_text
+    for date_format in date_formats:
+        if not unparsed.any():
+            break
+        attempt = pd.to_datetime(text[unparsed], format=date_format, errors='coerce')
+        attempt = attempt[attempt.notnull()]
+        parsed[attempt.index] = attempt
+        unparsed = unparsed & parsed.isnull()
+    
+    # cells Excel stored as numbers or dates in a column that also has text
+    rest = ~is_text & ~is_blank
+    if rest.any():
+        numbers = pd.to_numeric(values[rest], errors='coerce')
+        is_number = numbers.notnull()
+        if is_number.any():
+            parsed[numbers[is_number].index] = pd.to_datetime(numbers[is_number].astype('float64'), unit='D', origin='1899-12-30')
+        dates = pd.to_datetime(values[rest][~is_number], errors='coerce')
+        dates = dates[dates.notnull()]
+        parsed[dates.index] = dates
+    
+    bad = values[~is_blank & parsed.isnull()]
+    if len(bad):
+        message = file + ': column ' + column + ' has ' + str(len(bad)) + ' values that do not match date formats ' + ', '.join(date_formats) + ', e.g. ' + repr(bad.iloc[0])
+        if STRICT_DATE_FORMATS:
+            raise ReportSchemaError(message)
+        print('Warning: ' + message + '. They are left blank.')
+    
+    return parsed
+
+# Method for downloading a report from the SFTP and reading it into a dataframe.
+# Reports with a schema are checked for their required columns before the sheet is parsed, read with the declared dtypes
+# and have their date columns converted here so the transforms get typed columns.
+def read_report(sftp, file):
+    
+    # the call log has no title row above the header
+    if file == 'NMS_Call_log.xlsx':
+        skiprows = 0
+    else:
+        skiprows = 1
+    
+    schema = REPORT_SCHEMAS.get(file)
+    
+    with io.BytesIO() as fl:
         
-        print(file)
+        sftp.getfo(file, fl, callback=None)
+        fl.seek(0)
         
-        with io.BytesIO() as fl:
+        if schema is None:
             
             # read data from the excel files pulled from the CTDI FTP
-            if file == 'NMS_Call_log.xlsx':
-                sftp.getfo(file, fl, callback=None)
-                fl.seek(0)
-                data = pd.read_excel(fl)
-            else:
-                sftp.getfo(file, fl, callback=None)
-                fl.seek(0)
-                data = pd.read_excel(fl,skiprows=1)
+            return pd.read_excel(fl,skiprows=skiprows)
+        
+        # read the header row only and check it before parsing the whole sheet
+        columns = pd.read_excel(fl,skiprows=skiprows,nrows=0).columns
+        fl.seek(0)
         
-        if file == '01_ORD_OPEN_ALL_RSL.xlsx':
+        required = list(schema['required']) + list(schema['dtypes']) + list(schema['dates'])
+        missing = [column for column in required if column not in columns]
+        if missing:
+            raise ReportSchemaError(file + ': missing required columns ' + ', '.join(missing))
         
-            # call the method
-            filter_data = ord_open_all_rsl(data)
+        # read data from the excel files pulled from the CTDI FTP
+        try:
+            data = pd.read_excel(fl,skiprows=skiprows,dtype=schema['dtypes'])
+        except ValueError as e:
+            raise ReportSchemaError(file + ': column types do not match the schema (' + str(e) + ')')
+    
+    for column, date_formats in schema['dates'].items():
+        data[column] = parse_dates(file, column, data[column], date_formats)
+    
+    return data
 
-            # The ID and range of a Google spreadsheet.
-            SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
-            RANGE_NAME = 'Sheet1!A1:AS1'
-            
-            # append data to Google Sheets
-            request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
-            request.execute()
+# Method for running a report through its transform and uploading the results to Google Sheets
+def upload_report(service, file, data):
+    
+    if file == '01_ORD_OPEN_ALL_RSL.xlsx':
+    
+        # call the method
+        filter_data = ord_open_all_rsl(data)
 
-        elif file == '06_RPLN_OPEN.xlsx':
+        # The ID and range of a Google spreadsheet.
+        SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
+        RANGE_NAME = 'Sheet1!A1:AS1'
+        
+        # append data to Google Sheets
+        request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
+        request.execute(num_retries=UPLOAD_RETRIES)
 
-            # call the method
-            filter_data = ingest_rpln_open_and_transfers(data)
+    elif file == '06_RPLN_OPEN.xlsx':
 
-            # The ID and range of a Google spreadsheet.
-            SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
-            RANGE_NAME = 'Sheet1!A1:AF1'
+        # call the method
+        filter_data = ingest_rpln_open_and_transfers(data)
 
-            # append data to Google Sheets
-            request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
-            request.execute()
+        # The ID and range of a Google spreadsheet.
+        SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
+        RANGE_NAME = 'Sheet1!A1:AF1'
 
-        elif file == 'Incomplete_RSL_Transfer.xlsx':
+        # append data to Google Sheets
+        request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
+        request.execute(num_retries=UPLOAD_RETRIES)
 
-            # call the method
-            filter_data = ingest_rpln_open_and_transfers(data)
+    elif file == 'Incomplete_RSL_Transfer.xlsx':
 
-            # The ID and range of a Google spreadsheet.
-            SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
-            RANGE_NAME = 'Sheet1!A1:AW1'
+        # call the method
+        filter_data = ingest_rpln_open_and_transfers(data)
 
-            # append data to Google Sheets
-            request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
-            request.execute()
+        # The ID and range of a Google spreadsheet.
+        SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
+        RANGE_NAME = 'Sheet1!A1:AW1'
 
-        elif file == '02_CS_MOL.xlsx':
+        # append data to Google Sheets
+        request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
+        request.execute(num_retries=UPLOAD_RETRIES)
 
-            # call the method
-            filter_data = cs_mol_return(data)
+    elif file == '02_CS_MOL.xlsx':
 
-            # The ID and range of a Google spreadsheet.
-            SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
-            RANGE_NAME = 'Sheet1!A1:Z1'
+        # call the method
+        filter_data = cs_mol_return(data)
 
-            # append data to Google Sheets
-            request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
-            request.execute()
+        # The ID and range of a Google spreadsheet.
+        SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
+        RANGE_NAME = 'Sheet1!A1:Z1'
 
-        elif file == '02_OSL_TSL_MOL.xlsx':
+        # append data to Google Sheets
+        request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
+        request.execute(num_retries=UPLOAD_RETRIES)
 
-            # call the method
-            filter_data = osl_tsl_mol_return(data)
+    elif file == '02_OSL_TSL_MOL.xlsx':
 
-            # The ID and range of a Google spreadsheet.
-            SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
-            RANGE_NAME = 'Sheet1!A1:AJ1'
+        # call the method
+        filter_data = osl_tsl_mol_return(data)
 
-            # append data to Google Sheets
-            request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
-            request.execute()
+        # The ID and range of a Google spreadsheet.
+        SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
+        RANGE_NAME = 'Sheet1!A1:AJ1'
 
-        elif file == '08_OPEN_RPLN_NEW_PUTAWAY.xlsx':
+        # append data to Google Sheets
+        request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
+        request.execute(num_retries=UPLOAD_RETRIES)
 
-            # call the method
-            filter_data_MOL, filter_data_NEW = open_rpln_putaway(data)
+    elif file == '08_OPEN_RPLN_NEW_PUTAWAY.xlsx':
 
-            # Range of Google spreadsheet. Both the MOL and NEW putaway have the same range.
-            RANGE_NAME = 'Sheet1!A1:AB1'
+        # call the method
+        filter_data_MOL, filter_data_NEW = open_rpln_putaway(data)
 
-            # The ID of a MOL putaway Google spreadsheet.
-            SPREADSHEET_ID_1 = 'ENTER GOOGLE SHEET ID'
+        # Range of Google spreadsheet. Both the MOL and NEW putaway have the same range.
+        RANGE_NAME = 'Sheet1!A1:AB1'
 
-            # The ID of a NEW putaway Google spreadsheet.
-            SPREADSHEET_ID_2 = 'ENTER GOOGLE SHEET ID'
-            
-            # append data to Google Sheets
-            request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID_1, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data_MOL.to_json(date_unit='s', date_format='iso', orient='values'))})
-            request.execute()
-            
-            # append data to Google Sheets
-            request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID_2, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data_NEW.to_json(date_unit='s', date_format='iso', orient='values'))})
-            request.execute()
+        # The ID of a MOL putaway Google spreadsheet.
+        SPREADSHEET_ID_1 = 'ENTER GOOGLE SHEET ID'
 
-        elif file == '01_ORD_CLOSED_RSL.xlsx':
+        # The ID of a NEW putaway Google spreadsheet.
+        SPREADSHEET_ID_2 = 'ENTER GOOGLE SHEET ID'
+        
+        # append data to Google Sheets
+        request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID_1, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data_MOL.to_json(date_unit='s', date_format='iso', orient='values'))})
+        request.execute(num_retries=UPLOAD_RETRIES)
+        
+        # append data to Google Sheets
+        request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID_2, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data_NEW.to_json(date_unit='s', date_format='iso', orient='values'))})
+        request.execute(num_retries=UPLOAD_RETRIES)
 
-            # call the method
-            filter_data = ord_closed_rsl(data)
+    elif file == '01_ORD_CLOSED_RSL.xlsx':
 
-            # The ID and range of a Google spreadsheet.
-            SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
-            RANGE_NAME = 'Sheet1!A1:AP1'
+        # call the method
+        filter_data = ord_closed_rsl(data)
 
-            # append data to Google Sheets
-            request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
-            request.execute()
+        # The ID and range of a Google spreadsheet.
+        SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
+        RANGE_NAME = 'Sheet1!A1:AP1'
 
-        elif file == "01_ORD_ALL_RSL.xlsx":
+        # append data to Google Sheets
+        request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
+        request.execute(num_retries=UPLOAD_RETRIES)
 
-            # call the method
-            filter_data = ingest_file_method(data)
+    elif file == "01_ORD_ALL_RSL.xlsx":
 
-            # The ID and range of a Google spreadsheet.
-            SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
-            RANGE_NAME = 'Sheet1!A1:AQ1'
+        # call the method
+        filter_data = ingest_file_method(data)
 
-            # append data to Google Sheets
-            request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
-            request.execute()
+        # The ID and range of a Google spreadsheet.
+        SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
+        RANGE_NAME = 'Sheet1!A1:AQ1'
 
-        elif file == "01_ORD_ALL_CS.xlsx":
+        # append data to Google Sheets
+        request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
+        request.execute(num_retries=UPLOAD_RETRIES)
 
-            # call the method
-            filter_data = ingest_file_method(data)
+    elif file == "01_ORD_ALL_CS.xlsx":
 
-            # The ID and range of a Google spreadsheet.
-            SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
-            RANGE_NAME = 'Sheet1!A1:Z1'
+        # call the method
+        filter_data = ingest_file_method(data)
 
-            # append data to Google Sheets
-            request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
-            request.execute()
+        # The ID and range of a Google spreadsheet.
+        SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
+        RANGE_NAME = 'Sheet1!A1:Z1'
 
-        elif file == "01_ORD_ALL_CS_CANCELLED.xlsx":
+        # append data to Google Sheets
+        request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
+        request.execute(num_retries=UPLOAD_RETRIES)
 
-            # call the method
-            filter_data = ingest_file_method(data)
+    elif file == "01_ORD_ALL_CS_CANCELLED.xlsx":
 
-            # The ID and range of a Google spreadsheet.
-            SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
-            RANGE_NAME = 'Sheet1!A1:Z1'
+        # call the method
+        filter_data = ingest_file_method(data)
 
-            # append data to Google Sheets
-            request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
-            request.execute()
+        # The ID and range of a Google spreadsheet.
+        SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
+        RANGE_NAME = 'Sheet1!A1:Z1'
 
-        elif file == "01_ORD_CANCEL_RSL.xlsx":
+        # append data to Google Sheets
+        request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
+        request.execute(num_retries=UPLOAD_RETRIES)
 
-            # call the method
-            filter_data = ingest_file_method(data)
+    elif file == "01_ORD_CANCEL_RSL.xlsx":
 
-            # The ID and range of a Google spreadsheet.
-            SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
-            RANGE_NAME = 'Sheet1!A1:AO1'
+        # call the method
+        filter_data = ingest_file_method(data)
 
-            # append data to Google Sheets
-            request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
-            request.execute()
+        # The ID and range of a Google spreadsheet.
+        SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
+        RANGE_NAME = 'Sheet1!A1:AO1'
 
-        elif file == "01_ORD_CS_NMS_CLOSED.xlsx":
+        # append data to Google Sheets
+        request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
+        request.execute(num_retries=UPLOAD_RETRIES)
 
-            # call the method
-            filter_data = ingest_file_method(data)
+    elif file == "01_ORD_CS_NMS_CLOSED.xlsx":
 
-            # The ID and range of a Google spreadsheet.
-            SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
-            RANGE_NAME = 'Sheet1!A1:U1'
+        # call the method
+        filter_data = ingest_file_method(data)
 
-            # append data to Google Sheets
-            request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
-            request.execute()
+        # The ID and range of a Google spreadsheet.
+        SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
+        RANGE_NAME = 'Sheet1!A1:U1'
 
-        elif file == "06_RPLN_DUE.xlsx":
+        # append data to Google Sheets
+        request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
+        request.execute(num_retries=UPLOAD_RETRIES)
 
-            # call the method
-            filter_data = ingest_file_method(data)
+    elif file == "06_RPLN_DUE.xlsx":
 
-            # The ID and range of a Google spreadsheet.
-            SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
-            RANGE_NAME = 'Sheet1!A1:AI1'
+        # call the method
+        filter_data = ingest_file_method(data)
 
-            # append data to Google Sheets
-            request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
-            request.execute()
+        # The ID and range of a Google spreadsheet.
+        SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
+        RANGE_NAME = 'Sheet1!A1:AI1'
+
+        # append data to Google Sheets
+        request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(filter_data.to_json(date_unit='s', date_format='iso', orient='values'))})
+        request.execute(num_retries=UPLOAD_RETRIES)
+    
+    elif file == "OSL_TSL_Live_Sites.xlsx":
+
+        # call the method
+        filter_data = ingest_file_method(data)
+
+        # The ID and range of a Google spreadsheet.
+        SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
+        RANGE_NAME = 'Sheet1!A1'
+
+        # append data to Google Sheets
+        request = service.spreadsheets().batchUpdate(spreadsheetId=SPREADSHEET_ID, body={'requests': [{'updateCells': {'range': {'sheetId': '0'}, 'fields': 'userEnteredValue'}}]})
+        request.execute(num_retries=UPLOAD_RETRIES)
         
-        elif file == "OSL_TSL_Live_Sites.xlsx":
+        filter_data.replace(np.nan,'',inplace=True)
+        request = service.spreadsheets().values().update(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', body={'values':filter_data.T.reset_index().T.values.tolist()})
+        request.execute(num_retries=UPLOAD_RETRIES)
 
-            # call the method
-            filter_data = ingest_file_method(data)
+    elif file == "RSL_Planning_Rpt.xlsx":
 
-            # The ID and range of a Google spreadsheet.
-            SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
-            RANGE_NAME = 'Sheet1!A1'
+        # call the method
+        filter_data, group_by_data = optimal_status(data)
 
-            # append data to Google Sheets
-            request = service.spreadsheets().batchUpdate(spreadsheetId=SPREADSHEET_ID, body={'requests': [{'updateCells': {'range': {'sheetId': '0'}, 'fields': 'userEnteredValue'}}]})
-            request.execute()
-            
-            filter_data.replace(np.nan,'',inplace=True)
-            request = service.spreadsheets().values().update(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', body={'values':filter_data.T.reset_index().T.values.tolist()})
-            request.execute()
+        # The ID and range of a Google spreadsheet. This is for the Raw RSL Planning Report. Due to the size limitation of Google Sheet at 5 million cells. I've had to trim the columns in the report significantly.
+        # Also, due to the number of rows in this report at ~170K, I will not be recording historical data. The Google Sheet data gets replaced weekly, not appended.
+        SPREADSHEET_ID_1 = 'ENTER GOOGLE SHEET ID'
+        RANGE_NAME_1 = 'Sheet1!A1'
 
-        elif file == "RSL_Planning_Rpt.xlsx":
+         # The ID and range of a Google spreadsheet. This is for the Optimal Keep Level trend line report.
+        SPREADSHEET_ID_2 = 'ENTER GOOGLE SHEET ID'
+        RANGE_NAME_2 = 'Sheet1!A1:D1'
 
-            # call the method
-            filter_data, group_by_data = optimal_status(data)
+        # append data to Google Sheets
+        request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID_2, range=RANGE_NAME_2, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(group_by_data.to_json(date_unit='s', date_format='iso', orient='values'))})
+        request.execute(num_retries=UPLOAD_RETRIES)
+        
+        # append data to Google Sheets
+        request = service.spreadsheets().batchUpdate(spreadsheetId=SPREADSHEET_ID_1, body={'requests': [{'updateCells': {'range': {'sheetId': '0'}, 'fields': 'userEnteredValue'}}]})
+        request.execute(num_retries=UPLOAD_RETRIES)
+        
+        filter_data.replace(np.nan,'',inplace=True)
+        request = service.spreadsheets().values().update(spreadsheetId=SPREADSHEET_ID_1, range=RANGE_NAME_1, valueInputOption='USER_ENTERED', body={'values':filter_data.T.reset_index().T.values.tolist()})
+        request.execute(num_retries=UPLOAD_RETRIES)
+        
+    elif file == "Zero_Stock.xlsx":
 
-            # The ID and range of a Google spreadsheet. This is for the Raw RSL Planning Report. Due to the size limitation of Google Sheet at 5 million cells. I've had to trim the columns in the report significantly.
-            # Also, due to the number of rows in this report at ~170K, I will not be recording historical data. The Google Sheet data gets replaced weekly, not appended.
-            SPREADSHEET_ID_1 = 'ENTER GOOGLE SHEET ID'
-            RANGE_NAME_1 = 'Sheet1!A1'
+        # call the method
+        filter_data, group_by_orders, group_by_no_orders = zero_stock(data)
 
-             # The ID and range of a Google spreadsheet. This is for the Optimal Keep Level trend line report.
-            SPREADSHEET_ID_2 = 'ENTER GOOGLE SHEET ID'
-            RANGE_NAME_2 = 'Sheet1!A1:D1'
+        # The ID and range of a Google spreadsheet. This is for the Raw RSL Planning Report. Due to the size limitation of Google Sheet at 5 million cells. I've had to trim the columns in the report significantly.
+        # Also, due to the number of rows in this report at ~170K, I will not be recording historical data. The Google Sheet data gets replaced weekly, not appended.
+        SPREADSHEET_ID_1 = 'ENTER GOOGLE SHEET ID'
+        RANGE_NAME_1 = 'Sheet1!A1'
 
-            # append data to Google Sheets
-            request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID_2, range=RANGE_NAME_2, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(group_by_data.to_json(date_unit='s', date_format='iso', orient='values'))})
-            request.execute()
-            
-            # append data to Google Sheets
-            request = service.spreadsheets().batchUpdate(spreadsheetId=SPREADSHEET_ID_1, body={'requests': [{'updateCells': {'range': {'sheetId': '0'}, 'fields': 'userEnteredValue'}}]})
-            request.execute()
-            
-            filter_data.replace(np.nan,'',inplace=True)
-            request = service.spreadsheets().values().update(spreadsheetId=SPREADSHEET_ID_1, range=RANGE_NAME_1, valueInputOption='USER_ENTERED', body={'values':filter_data.T.reset_index().T.values.tolist()})
-            request.execute()
-            
-        elif file == "Zero_Stock.xlsx":
+         # The ID and range of a Google spreadsheet. This is for the Optimal Keep Level trend line report.
+        SPREADSHEET_ID_2 = 'ENTER GOOGLE SHEET ID'
+        RANGE_NAME_2 = 'With Orders!A1:Q1'
+        RANGE_NAME_3 = 'No Orders!A1:P1'
+        
+        # append data to Google Sheets
+        request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID_2, range=RANGE_NAME_2, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(group_by_orders.to_json(date_unit='s', date_format='iso', orient='values'))})
+        request.execute(num_retries=UPLOAD_RETRIES)
+        
+        # append data to Google Sheets
+        request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID_2, range=RANGE_NAME_3, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(group_by_no_orders.to_json(date_unit='s', date_format='iso', orient='values'))})
+        request.execute(num_retries=UPLOAD_RETRIES)
+        
+        # append data to Google Sheets
+        request = service.spreadsheets().batchUpdate(spreadsheetId=SPREADSHEET_ID_1, body={'requests': [{'updateCells': {'range': {'sheetId': '0'}, 'fields': 'userEnteredValue'}}]})
+        request.execute(num_retries=UPLOAD_RETRIES)
+        
+        filter_data.replace(np.nan,'',inplace=True)
+        request = service.spreadsheets().values().update(spreadsheetId=SPREADSHEET_ID_1, range=RANGE_NAME_1, valueInputOption='USER_ENTERED', body={'values':filter_data.T.reset_index().T.values.tolist()})
+        request.execute(num_retries=UPLOAD_RETRIES)
+        
+    elif file == "AVP_Report_Weekly.xlsx":
 
-            # call the method
-            filter_data, group_by_orders, group_by_no_orders = zero_stock(data)
+        # call the method
+        filter_data = ingest_file_method(data)
 
-            # The ID and range of a Google spreadsheet. This is for the Raw RSL Planning Report. Due to the size limitation of Google Sheet at 5 million cells. I've had to trim the columns in the report significantly.
-            # Also, due to the number of rows in this report at ~170K, I will not be recording historical data. The Google Sheet data gets replaced weekly, not appended.
-            SPREADSHEET_ID_1 = 'ENTER GOOGLE SHEET ID'
-            RANGE_NAME_1 = 'Sheet1!A1'
+        # The ID and range of a Google spreadsheet.
+        SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
+        RANGE_NAME = 'Sheet1!A1'
 
-             # The ID and range of a Google spreadsheet. This is for the Optimal Keep Level trend line report.
-            SPREADSHEET_ID_2 = 'ENTER GOOGLE SHEET ID'
-            RANGE_NAME_2 = 'With Orders!A1:Q1'
-            RANGE_NAME_3 = 'No Orders!A1:P1'
-            
-            # append data to Google Sheets
-            request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID_2, range=RANGE_NAME_2, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(group_by_orders.to_json(date_unit='s', date_format='iso', orient='values'))})
-            request.execute()
-            
-            # append data to Google Sheets
-            request = service.spreadsheets().values().append(spreadsheetId=SPREADSHEET_ID_2, range=RANGE_NAME_3, valueInputOption='USER_ENTERED', insertDataOption='INSERT_ROWS', body={'values':json.loads(group_by_no_orders.to_json(date_unit='s', date_format='iso', orient='values'))})
-            request.execute()
-            
-            # append data to Google Sheets
-            request = service.spreadsheets().batchUpdate(spreadsheetId=SPREADSHEET_ID_1, body={'requests': [{'updateCells': {'range': {'sheetId': '0'}, 'fields': 'userEnteredValue'}}]})
-            request.execute()
-            
-            filter_data.replace(np.nan,'',inplace=True)
-            request = service.spreadsheets().values().update(spreadsheetId=SPREADSHEET_ID_1, range=RANGE_NAME_1, valueInputOption='USER_ENTERED', body={'values':filter_data.T.reset_index().T.values.tolist()})
-            request.execute()
-            
-        elif file == "AVP_Report_Weekly.xlsx":
+        # append data to Google Sheets
+        request = service.spreadsheets().batchUpdate(spreadsheetId=SPREADSHEET_ID, body={'requests': [{'updateCells': {'range': {'sheetId': '0'}, 'fields': 'userEnteredValue'}}]})
+        request.execute(num_retries=UPLOAD_RETRIES)
+        
+        filter_data.replace(np.nan,'',inplace=True)
+        filter_data = filter_data.applymap(str)
+        request = service.spreadsheets().values().update(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', body={'values':filter_data.T.reset_index().T.values.tolist()})
+        request.execute(num_retries=UPLOAD_RETRIES)
+    
+    elif file == "NMS_Call_log.xlsx":
 
-            # call the method
-            filter_data = ingest_file_method(data)
+        # call the method
+        filter_data = ingest_file_method(data)
 
-            # The ID and range of a Google spreadsheet.
-            SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
-            RANGE_NAME = 'Sheet1!A1'
+        # The ID and range of a Google spreadsheet.
+        SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
+        RANGE_NAME = 'Sheet1!A1'
 
-            # append data to Google Sheets
-            request = service.spreadsheets().batchUpdate(spreadsheetId=SPREADSHEET_ID, body={'requests': [{'updateCells': {'range': {'sheetId': '0'}, 'fields': 'userEnteredValue'}}]})
-            request.execute()
-            
-            filter_data.replace(np.nan,'',inplace=True)
-            filter_data = filter_data.applymap(str)
-            request = service.spreadsheets().values().update(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', body={'values':filter_data.T.reset_index().T.values.tolist()})
-            request.execute()
+        # append data to Google Sheets
+        request = service.spreadsheets().batchUpdate(spreadsheetId=SPREADSHEET_ID, body={'requests': [{'updateCells': {'range': {'sheetId': '0'}, 'fields': 'userEnteredValue'}}]})
+        request.execute(num_retries=UPLOAD_RETRIES)
+        
+        filter_data.replace(np.nan,'',inplace=True)
+        filter_data = filter_data.applymap(str)
+        request = service.spreadsheets().values().update(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', body={'values':filter_data.T.reset_index().T.values.tolist()})
+        request.execute(num_retries=UPLOAD_RETRIES)
         
-        elif file == "NMS_Call_log.xlsx":
+    else:
+        print('unknown')
 
-            # call the method
-            filter_data = ingest_file_method(data)
+# Local directory stand-in for the SFTP connection. Exposes the same listdir, listdir_attr, getfo and close calls used
+# above so the batch and watch modes can be run against a folder of report files without the CTDI gateway.
+class LocalDirectory:
+    
+    def __init__(self, path):
+        self.path = path
+    
+    def listdir(self):
+        return [attr.filename for attr in self.listdir_attr()]
+    
+    def listdir_attr(self):
+        return [paramiko.SFTPAttributes.from_stat(os.stat(os.path.join(self.path, file)), file) for file in sorted(os.listdir(self.path)) if os.path.isfile(os.path.join(self.path, file))]
+    
+    def getfo(self, remotepath, flo, callback=None):
+        with open(os.path.join(self.path, remotepath), 'rb') as fl:
+            shutil.copyfileobj(fl, flo)
+    
+    def close(self):
+        pass
+
+# Method for opening the SFTP connection to the Reporting directory
+def connect_sftp():
+    
+    # Change directory of public key file. Otherwise it looks at the ~/.ssh/known_hosts directory locally
+    cnopts = pysftp.CnOpts(knownhosts=os.path.join(directory, '.pub'))
+    
+    # Instruct pysftp to not look for hostkeys directory
+    cnopts.hostkeys = None
+    
+    # Open SFTP (secure file transfer protocol) to internal gateway that controls connection to outside networks.
+    sftp = pysftp.Connection(host='', username='', private_key=os.path.join(directory, '.pem'), cnopts=cnopts)
+    
+    print("Connection succesfully established ... ")
+    
+    # Switch to a remote directory
+    sftp.cwd('/..../Reporting/')
+    
+    return sftp
 
-            # The ID and range of a Google spreadsheet.
-            SPREADSHEET_ID = 'ENTER GOOGLE SHEET ID'
-            RANGE_NAME = 'Sheet1!A1'
+# Method for the weekly one-shot run. Pulls every file in the Reporting directory and uploads it.
+def run_batch(sftp, service):
+    
+    # Obtain structure of the remote directory
+    directory_structure = sftp.listdir()
 
-            # append data to Google Sheets
-            request = service.spreadsheets().batchUpdate(spreadsheetId=SPREADSHEET_ID, body={'requests': [{'updateCells': {'range': {'sheetId': '0'}, 'fields': 'userEnteredValue'}}]})
-            request.execute()
+    # Print file names
+    for file in directory_structure:
+        
+        print(file)
+        
+        data = read_report(sftp, file)
+        upload_report(service, file, data)
+
+# Method for closing a session without raising, used when it may already be broken
+def close_session(sftp):
+    
+    if sftp is not None:
+        try:
+            sftp.close()
+        except Exception:
+            pass
+    
+    return None
+
+# Method for loading the saved (size, modified time) of each report the watch mode has finished with
+def load_watch_state(state_file):
+    
+    if not os.path.exists(state_file):
+        return None
+    
+    with open(state_file) as fl:
+        return {file: tuple(signature) for file, signature in json.load(fl).items()}
+
+# Method for saving the watch state. Written to a temporary file first so a crash does not leave it half written.
+def save_watch_state(state_file, state):
+    
+    with open(state_file + '.tmp', 'w') as fl:
+        json.dump(state, fl)
+    
+    os.replace(state_file + '.tmp', state_file)
+
+# Method for the long-running watch mode. Keeps one session from connect() open and polls the directory listing, processing
+# each report as it lands instead of all ~17 files at once.
+# A file is only picked up once its size and modified time have stayed the same for settle_time seconds, so files that
+# are still being written are not read half way. Downloads happen on the session in this thread and the transform and
+# Google Sheets upload happen on a worker thread. The queue between them holds at most queue_size downloaded reports, so
+# polling waits when Google Sheets falls behind rather than piling dataframes up in memory.
+# If listing or downloading fails with a connection error the session is closed, connect() is called again on the next
+# poll and the file is retried once it has settled again. Any other error reading or uploading a report is printed and
+# that version of the file is skipped until the server writes a new one. Transient Google Sheets errors are already
+# retried in upload_report, and the report is not run again because some of its sheets may have been written.
+# The version of each report that was finished with is saved to state_file, so reports that land while the watch mode is
+# down are picked up when it starts again. With no saved state, the files already on the server are treated as processed
+# unless process_existing is set. Set the stop event to end the loop. Reports already queued are uploaded before it returns.
+def watch_reporting(connect, service, poll_interval=WATCH_POLL_INTERVAL, settle_time=WATCH_SETTLE_TIME, queue_size=WATCH_QUEUE_SIZE, process_existing=False, state_file=None, stop=None):
+    
+    if stop is None:
+        stop = threading.Event()
+    
+    if state_file is None:
+        state_file = os.path.join(directory, WATCH_STATE_FILE)
+    
+    # (size, modified time) of the last version of each file that was uploaded or skipped, shared with the worker
+    state = load_watch_state(state_file)
+    state_lock = threading.Lock()
+    
+    def finished(file, signature):
+        with state_lock:
+            state[file] = signature
+            save_watch_state(state_file, state)
+    
+    work = queue.Queue(maxsize=queue_size)
+    
+    def worker():
+        while True:
+            item = work.get()
+            try:
+                # None tells the worker to shut down
+                if item is None:
+                    return
+                file, signature, data = item
+                try:
+                    upload_report(service, file, data)
+                except Exception as e:
+                    print('Failed to upload ' + file + ', skipping until it changes: ' + str(e))
+                finished(file, signature)
+            finally:
+                work.task_done()
+    
+    thread = threading.Thread(target=worker, daemon=True)
+    thread.start()
+    
+    # (size, modified time) of the last version of each file that was queued or skipped
+    processed = None
+    
+    # (size, modified time) of each changed file and when that version was first seen, waiting to settle
+    pending = {}
+    
+    sftp = None
+    
+    print("Watching for new reports ... ")
+    
+    try:
+        
+        while not stop.is_set():
             
-            filter_data.replace(np.nan,'',inplace=True)
-            filter_data = filter_data.applymap(str)
-            request = service.spreadsheets().values().update(spreadsheetId=SPREADSHEET_ID, range=RANGE_NAME, valueInputOption='USER_ENTERED', body={'values':filter_data.T.reset_index().T.values.tolist()})
-            request.execute()
+            try:
+                if sftp is None:
+                    sftp = connect()
+                listing = sftp.listdir_attr()
+            except Exception as e:
+                print('Failed to list the Reporting directory, will reconnect: ' + str(e))
+                sftp = close_session(sftp)
+                stop.wait(poll_interval)
+                continue
             
-        else:
-            print('unknown')
\ No newline at end of file
+            now = time.monotonic()
+            
+            if processed is None:
+                if state is None:
+                    state = {}
+                    if not process_existing:
+                        for attr in listing:
+                            finished(attr.filename, (attr.st_size, attr.st_mtime))
+                processed = dict(state)
+            
+            # forget files that were removed before they settled
+            names = set(attr.filename for attr in listing)
+            pending = {file: value for file, value in pending.items() if file in names}
+            
+            for attr in listing:
+                
+                file = attr.filename
+                signature = (attr.st_size, attr.st_mtime)
+                
+                # nothing new since the last time this file was processed
+                if processed.get(file) == signature:
+                    pending.pop(file, None)
+                    continue
+                
+                # new or still changing, restart the settle timer
+                if file not in pending or pending[file][0] != signature:
+                    pending[file] = (signature, now)
+                    continue
+                
+                if now - pending[file][1] < settle_time:
+                    continue
+                
+                print(file)
+                
+                try:
+                    data = read_report(sftp, file)
+                except (IOError, EOFError, paramiko.SSHException) as e:
+                    # wait for it to settle again and reconnect in case the session dropped
+                    print('Failed to download ' + file + ', will retry: ' + str(e))
+                    pending[file] = (signature, now)
+                    sftp = close_session(sftp)
+                    break
+                except Exception as e:
+                    # the file itself is bad, wait for the server to write a new version
+                    print('Failed to read ' + file + ', skipping until it changes: ' + str(e))
+                    del pending[file]
+                    processed[file] = signature
+                    finished(file, signature)
+                    continue
+                
+                del pending[file]
+                processed[file] = signature
+                
+                # blocks while the queue is full
+                work.put((file, signature, data))
+            
+            stop.wait(poll_interval)
+    
+    finally:
+        
+        # let the worker finish what is already queued
+        work.put(None)
+        thread.join()
+        close_session(sftp)
+
+if __name__ == '__main__':
+    
+    parser = argparse.ArgumentParser(description='Pull the NMS reports and upload the KPI results to Google Sheets.')
+    parser.add_argument('--watch', action='store_true', help='keep running and process reports as they land instead of a one-shot run')
+    parser.add_argument('--local', metavar='PATH', help='read the reports from a local directory instead of the SFTP')
+    args = parser.parse_args()
+    
+    service = google_sheets()
+    
+    if args.local:
+        connect = lambda: LocalDirectory(args.local)
+    else:
+        connect = connect_sftp
+    
+    if args.watch:
+        watch_reporting(connect, service)
+    else:
+        sftp = connect()
+        try:
+            run_batch(sftp, service)
+        finally:
+            sftp.close()
@@ -0,0 +1,105 @@
+import datetime
+import io
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import NMS_KPI_Automation as kpi
+
+
+# stand-in for the SFTP connection that serves in-memory excel files
+class Reports:
+
+    def __init__(self, **files):
+        self.files = files
+
+    def getfo(self, remotepath, flo, callback=None):
+        flo.write(self.files[remotepath])
+
+
+# build a report the way CTDI sends it, with a title row above the header
+def report(data):
+    with io.BytesIO() as fl:
+        pd.DataFrame(data).to_excel(fl, startrow=1, index=False)
+        return fl.getvalue()
+
+
+# read a 02_CS_MOL report, STATUS keeps rows with a blank SHIP_TIME from being dropped as empty
+def read_ship_times(ship_times):
+    sftp = Reports(**{'02_CS_MOL.xlsx': report({'STATUS': ['S'] * len(ship_times), 'SHIP_TIME': ship_times})})
+    return kpi.read_report(sftp, '02_CS_MOL.xlsx')['SHIP_TIME']
+
+
+def test_missing_column_raises():
+    sftp = Reports(**{'02_CS_MOL.xlsx': report({'STATUS': ['S']})})
+
+    with pytest.raises(kpi.ReportSchemaError, match='SHIP_TIME'):
+        kpi.read_report(sftp, '02_CS_MOL.xlsx')
+
+
+def test_declared_dtypes_are_applied():
+    sftp = Reports(**{'RSL_Planning_Rpt.xlsx': report({
+        'UNIT': ['A'], 'DESCRIPTION': ['B'], 'CUSTOMER CODE': ['C'], 'STOCK_LOC_ID': ['D'], 'STATE': ['TX'],
+        'BOH': [1], 'OPTIMAL_KEEP': [2], 'TWO_YR_USAGE': [3],
+    })})
+
+    data = kpi.read_report(sftp, 'RSL_Planning_Rpt.xlsx')
+
+    assert data['BOH'].dtype == 'float64'
+    assert data['OPTIMAL_KEEP'].dtype == 'float64'
+    assert data['TWO_YR_USAGE'].dtype == 'float64'
+
+
+def test_numeric_column_with_text_raises():
+    sftp = Reports(**{'RSL_Planning_Rpt.xlsx': report({
+        'UNIT': ['A'], 'DESCRIPTION': ['B'], 'CUSTOMER CODE': ['C'], 'STOCK_LOC_ID': ['D'], 'STATE': ['TX'],
+        'BOH': ['lots'], 'OPTIMAL_KEEP': [2], 'TWO_YR_USAGE': [3],
+    })})
+
+    with pytest.raises(kpi.ReportSchemaError):
+        kpi.read_report(sftp, 'RSL_Planning_Rpt.xlsx')
+
+
+def test_text_dates_are_parsed_with_the_declared_formats():
+    ship_times = read_ship_times(['07/27/2021 10:30:15', '07/28/2021 11:45', '07/29/2021', None])
+
+    assert list(ship_times[:3]) == [pd.Timestamp(2021, 7, 27, 10, 30, 15), pd.Timestamp(2021, 7, 28, 11, 45), pd.Timestamp(2021, 7, 29)]
+    assert pd.isnull(ship_times.iloc[3])
+
+
+def test_all_blank_date_column_is_nat():
+    ship_times = read_ship_times([None, None])
+
+    assert len(ship_times) == 2
+    assert ship_times.isnull().all()
+
+
+def test_excel_serials_are_converted():
+    ship_times = read_ship_times([44197.0, 44198.5])
+
+    assert list(ship_times) == [pd.Timestamp(2021, 1, 1), pd.Timestamp(2021, 1, 2, 12)]
+
+
+def test_mixed_text_dates_and_serials_are_converted():
+    values = pd.Series(['07/27/2021', datetime.datetime(2021, 7, 28), 44197.0, np.nan, ''], dtype=object)
+
+    parsed = kpi.parse_dates('02_OSL_TSL_MOL.xlsx', 'FINALIZE_DATE', values, kpi.DATE_FORMATS)
+
+    assert list(parsed[:3]) == [pd.Timestamp(2021, 7, 27), pd.Timestamp(2021, 7, 28), pd.Timestamp(2021, 1, 1)]
+    assert parsed[3:].isnull().all()
+
+
+def test_mismatched_dates_warn_and_are_left_blank(capsys):
+    ship_times = read_ship_times(['07/27/2021 10:30:15', '2021-07-28'])
+
+    assert ship_times.iloc[0] == pd.Timestamp(2021, 7, 27, 10, 30, 15)
+    assert pd.isnull(ship_times.iloc[1])
+    assert "1 values that do not match date formats" in capsys.readouterr().out
+
+
+def test_mismatched_dates_raise_when_strict(monkeypatch):
+    monkeypatch.setattr(kpi, 'STRICT_DATE_FORMATS', True)
+
+    with pytest.raises(kpi.ReportSchemaError, match='SHIP_TIME'):
+        read_ship_times(['07/27/2021 10:30:15', '2021-07-28'])
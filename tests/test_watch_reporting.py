@@ -0,0 +1,231 @@
+import os
+import threading
+import time
+
+import pytest
+
+import NMS_KPI_Automation as kpi
+
+
+# wait for a condition checked by the watch thread, failing the test after a few seconds
+def wait_for(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError('timed out waiting for the watch loop')
+        time.sleep(0.01)
+
+
+def write(path, text):
+    with open(path, 'w') as fl:
+        fl.write(text)
+
+
+@pytest.fixture
+def watch(tmp_path, monkeypatch):
+    reads = []
+    uploads = []
+    threads = []
+    stop = threading.Event()
+
+    def read_report(sftp, file):
+        with open(os.path.join(sftp.path, file)) as fl:
+            data = fl.read()
+        reads.append((file, data))
+        return data
+
+    def upload_report(service, file, data):
+        uploads.append((file, data))
+
+    monkeypatch.setattr(kpi, 'read_report', read_report)
+    monkeypatch.setattr(kpi, 'upload_report', upload_report)
+
+    reports = tmp_path / 'reports'
+    reports.mkdir()
+    state_file = str(tmp_path / 'watch_state.json')
+
+    def start(connect=None, **kwargs):
+        if connect is None:
+            connect = lambda: kpi.LocalDirectory(str(reports))
+        thread = threading.Thread(target=kpi.watch_reporting, args=(connect, None), kwargs=dict(poll_interval=0.02, settle_time=0.1, state_file=state_file, stop=stop, **kwargs))
+        thread.start()
+        threads.append(thread)
+
+    watch = type('Watch', (), {})()
+    watch.path = reports
+    watch.state_file = state_file
+    watch.reads = reads
+    watch.uploads = uploads
+    watch.stop = stop
+    watch.threads = threads
+    watch.start = start
+
+    yield watch
+
+    stop.set()
+    for thread in threads:
+        thread.join(5)
+        assert not thread.is_alive()
+
+
+def test_skips_existing_and_processes_new_files_once_settled(watch):
+    write(watch.path / 'old.xlsx', 'old')
+    watch.start()
+    time.sleep(0.1)
+
+    write(watch.path / 'new.xlsx', 'a')
+    time.sleep(0.05)
+    write(watch.path / 'new.xlsx', 'ab')
+
+    wait_for(lambda: watch.uploads)
+    time.sleep(0.3)
+
+    assert watch.uploads == [('new.xlsx', 'ab')]
+
+
+def test_rewritten_file_is_processed_again(watch):
+    write(watch.path / 'report.xlsx', 'first')
+    watch.start(process_existing=True)
+    wait_for(lambda: len(watch.uploads) == 1)
+
+    write(watch.path / 'report.xlsx', 'second version')
+    wait_for(lambda: len(watch.uploads) == 2)
+    time.sleep(0.3)
+
+    assert watch.uploads == [('report.xlsx', 'first'), ('report.xlsx', 'second version')]
+
+
+def test_stop_drains_the_queue(watch, monkeypatch):
+    uploads = []
+
+    def slow_upload(service, file, data):
+        time.sleep(0.2)
+        uploads.append(file)
+
+    monkeypatch.setattr(kpi, 'upload_report', slow_upload)
+
+    write(watch.path / 'a.xlsx', 'a')
+    write(watch.path / 'b.xlsx', 'b')
+    watch.start(process_existing=True)
+
+    wait_for(lambda: len(watch.reads) == 2)
+    watch.stop.set()
+    watch.threads[0].join(5)
+
+    # both reports were queued before the stop and are uploaded before watch_reporting returns
+    assert sorted(uploads) == ['a.xlsx', 'b.xlsx']
+
+
+def test_failed_upload_is_not_run_again(watch, monkeypatch):
+    attempts = []
+
+    def failing_upload(service, file, data):
+        attempts.append(file)
+        raise RuntimeError('bad data')
+
+    monkeypatch.setattr(kpi, 'upload_report', failing_upload)
+
+    write(watch.path / 'report.xlsx', 'data')
+    watch.start(process_existing=True)
+
+    wait_for(lambda: attempts)
+    time.sleep(0.3)
+
+    assert attempts == ['report.xlsx']
+
+
+def test_bad_file_waits_for_a_new_version(watch, monkeypatch):
+    reads = []
+
+    def read_report(sftp, file):
+        reads.append(file)
+        if len(reads) == 1:
+            raise kpi.ReportSchemaError(file + ': missing required columns ORD_DATE')
+        return 'fixed'
+
+    monkeypatch.setattr(kpi, 'read_report', read_report)
+
+    write(watch.path / 'report.xlsx', 'bad')
+    watch.start(process_existing=True)
+
+    wait_for(lambda: reads)
+    time.sleep(0.3)
+    assert reads == ['report.xlsx']
+    assert watch.uploads == []
+
+    write(watch.path / 'report.xlsx', 'fixed version')
+    wait_for(lambda: watch.uploads)
+    assert watch.uploads == [('report.xlsx', 'fixed')]
+
+
+def test_download_error_is_retried(watch, monkeypatch):
+    reads = []
+
+    def read_report(sftp, file):
+        reads.append(file)
+        if len(reads) == 1:
+            raise IOError('connection reset')
+        return 'data'
+
+    monkeypatch.setattr(kpi, 'read_report', read_report)
+
+    write(watch.path / 'report.xlsx', 'data')
+    watch.start(process_existing=True)
+
+    wait_for(lambda: watch.uploads)
+    assert reads == ['report.xlsx', 'report.xlsx']
+    assert watch.uploads == [('report.xlsx', 'data')]
+
+
+def test_reports_landing_while_stopped_are_processed_on_restart(watch):
+    write(watch.path / 'old.xlsx', 'old')
+    watch.start()
+    time.sleep(0.1)
+    watch.stop.set()
+    watch.threads[0].join(5)
+
+    write(watch.path / 'new.xlsx', 'new')
+    write(watch.path / 'old.xlsx', 'old changed')
+
+    watch.stop.clear()
+    watch.start()
+
+    wait_for(lambda: len(watch.uploads) == 2)
+    time.sleep(0.3)
+
+    assert sorted(watch.uploads) == [('new.xlsx', 'new'), ('old.xlsx', 'old changed')]
+
+
+def test_processed_reports_are_not_uploaded_again_on_restart(watch):
+    write(watch.path / 'report.xlsx', 'data')
+    watch.start(process_existing=True)
+    wait_for(lambda: watch.uploads)
+    watch.stop.set()
+    watch.threads[0].join(5)
+
+    watch.stop.clear()
+    watch.start(process_existing=True)
+    time.sleep(0.3)
+
+    assert watch.uploads == [('report.xlsx', 'data')]
+
+
+def test_reconnects_after_listing_fails(watch):
+    connections = []
+
+    class DroppedConnection(kpi.LocalDirectory):
+        def listdir_attr(self):
+            raise IOError('connection reset')
+
+    def connect():
+        connections.append(None)
+        if len(connections) == 1:
+            return DroppedConnection(str(watch.path))
+        return kpi.LocalDirectory(str(watch.path))
+
+    write(watch.path / 'report.xlsx', 'data')
+    watch.start(connect=connect, process_existing=True)
+
+    wait_for(lambda: watch.uploads)
+    assert len(connections) == 2
+    assert watch.uploads == [('report.xlsx', 'data')]